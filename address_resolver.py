@@ -8,7 +8,7 @@ __description__ = '''A tool that takes a list of IP addresses or hostnames and t
 
 
 import sys
-if sys.version < "3.5":
+if sys.version_info < (3, 5):
     print('[-] This script requires at least Python 3.5. Sorry.')
     exit()
 
@@ -57,6 +57,62 @@ def cidr_ip_range(input_string: str) -> list:
     return addrs
 
 
+def range_input_data(input_string: str) -> list:
+    """Accepts a CIDR range (10.10.10.0/24) or a dash specified range
+    (10.10.10.20-40) and returns a list of ip addresses within the range.
+    Raises ValueError with a message for the user if the range is invalid.
+    """
+    if not '-' in input_string and not '/' in input_string:
+        raise ValueError("Please either specify a CIDR range or an octet range with a dash ('-').")
+
+    # https://www.regextester.com/93987
+    cidr_regex = r'^([0-9]{1,3}\.){3}[0-9]{1,3}(\/([0-9]|[1-2][0-9]|3[0-2]))?$'
+
+    # adapted from https://stackoverflow.com/questions/10086572/ip-address-validation-in-python-using-regex
+    dash_regex = r'^[\d+-?]{1,7}\.[\d+-?]{1,7}\.[\d+-?]{1,7}\.[\d+-?]{1,7}$'
+
+    # Each octet is a number or a range of numbers
+    octet_regex = r'^\d{1,3}(-\d{1,3})?$'
+
+    if '-' in input_string:
+        if '/' in input_string:
+            raise ValueError("Please either use CIDR notation or specify octet range with a dash ('-'), not both.")
+        octets = input_string.split('.')
+        if not re.findall(dash_regex, input_string) or not all(re.match(octet_regex, octet) for octet in octets):
+            raise ValueError('Invalid IP range detected. Please try again.')
+
+        # Additional validation to dump any octet larger than 255
+        addrs = []
+        for addr in ip_range(input_string):
+            octets = str(addr).split('.')
+            invalid_addr = [octet for octet in octets if int(octet) > 255]
+            if invalid_addr:
+                continue
+            addrs.append(addr)
+        return addrs
+
+    if not re.findall(cidr_regex, input_string):
+        raise ValueError('Invalid CIDR range detected. Please try again.')
+    try:
+        return cidr_ip_range(input_string)
+    except ValueError as error:
+        raise ValueError(f'Invalid CIDR range detected. Please try again.\n[-] {error}')
+
+
+def build_input_data(filename: str, range_string: str) -> list:
+    """Reads IP addresses and hostnames from a file and/or expands an IP
+    range. Returns the combined list with duplicates removed. Raises
+    ValueError if the range is invalid.
+    """
+    input_data = []
+    if filename:
+        with open(filename) as f:
+            input_data = f.read().splitlines()
+    if range_string:
+        input_data += range_input_data(range_string)
+    return list(set(i for i in input_data if i))
+
+
 def validate_input_data(data: list) -> tuple:
     """Iterates through a list of input data to check for IP addresses and
     hostnames. Returns a tuple of IP addresses and hostnames.
@@ -96,6 +152,7 @@ async def find_ipaddress(hostname: str):
     resolved_data.append((ip, hostname))
     if not args.quiet:
         print(f"{ip:20}{hostname:20}")
+    return ip, hostname
 
 
 async def find_all_ipaddrs(hostnames: list):
@@ -120,6 +177,7 @@ async def find_hostname(ip_addr: str):
     if not args.quiet:
         print(f"{ip_addr:20}{host_name:20}")
     resolved_data.append((ip_addr, host_name))
+    return ip_addr, host_name
 
 
 async def find_all_hosts(ip_addrs: list):
@@ -199,9 +257,6 @@ if __name__ == '__main__':
               "and/or hostnames (-f) or a range of IP address (-r).")
         exit()
 
-    # Initialize input data
-    input_data = []
-
     if args.filename:
         filename = args.filename
         if not os.path.exists(filename):
@@ -209,55 +264,13 @@ if __name__ == '__main__':
             print(f"[-] The file {filename} cannot be found or you do not have "
                    "permission to open the file.")
             exit()
-        with open(filename) as f:
-            input_data = f.read().splitlines()
 
-    if args.range:
-        if not '-' in args.range and not '/' in args.range:
-            if sys.version.startswith('3'):
-                parser.print_help()
-                print("[-] Please either specify a CIDR range or an octet range with a dash ('-').")
-                exit()
-            else:
-                parser.print_help()
-                print("[-] Please specify an octet range with a dash ('-').")
-                exit()
-
-        # https://www.regextester.com/93987
-        cidr_regex = r'^([0-9]{1,3}\.){3}[0-9]{1,3}(\/([0-9]|[1-2][0-9]|3[0-2]))?$'
-
-        # adapted from https://stackoverflow.com/questions/10086572/ip-address-validation-in-python-using-regex
-        dash_regex = r'^[\d+-?]{1,7}\.[\d+-?]{1,7}\.[\d+-?]{1,7}\.[\d+-?]{1,7}$'
-
-        if '-' in args.range:
-            if '/' in args.range:
-                print("[-] Please either use CIDR notation or specify octet range with a dash ('-'), not both.")
-                exit()
-            if not re.findall(dash_regex, args.range):
-                parser.print_help()
-                print('[-] Invalid IP range detected. Please try again.')
-                exit()
-            ip_addrs = ip_range(args.range)
-
-            # Additional validation to dump any octet larger than 255
-            for addr in ip_addrs:
-                octets = str(addr).split('.')
-                invalid_addr = [octet for octet in octets if int(octet) > 255]
-                if invalid_addr:
-                    continue
-                input_data.append(addr)
-        elif '/' in args.range:
-            try:
-                if not re.findall(cidr_regex, args.range):
-                    parser.print_help()
-                    print('[-] Invalid CIDR range detected. Please try again.')
-                    exit()
-                input_data = cidr_ip_range(args.range)
-            except ValueError as error:
-                parser.print_help()
-                print('[-] Invalid CIDR range detected. Please try again.')
-                print(f'[-] {error}')
-                exit()
+    try:
+        input_data = build_input_data(args.filename, args.range)
+    except ValueError as error:
+        parser.print_help()
+        print(f'[-] {error}')
+        exit()
 
     if args.csv.endswith(".csv"):
         csv_name = args.csv
@@ -0,0 +1,711 @@
+#!/usr/bin/env python3
+
+
+__author__ = 'Jake Miller (@LaconicWolf)'
+__date__ = '20261019'
+__version__ = '0.01'
+__description__ = '''Splits a web_requester or address_resolver scan across worker processes on multiple nodes'''
+
+
+import sys
+if sys.version_info < (3, 7):
+    print('[-] This script requires at least Python 3.7. Sorry.')
+    exit()
+
+import argparse
+import asyncio
+import collections
+import importlib
+import itertools
+import json
+import os
+import socket
+import time
+
+# The scanning modules are imported on demand by load_tool(), so a node
+# only needs the third party modules for the mode it is running.
+TOOLS = {
+    'web': 'web_requester',
+    'resolve': 'address_resolver',
+}
+
+# Header row written to the CSV file for each mode. Matches the output
+# of the standalone tools.
+CSV_HEADERS = {
+    'web': 'Requested URL,Response Code,isRedirect,Response URL,Server Header,Title',
+    'resolve': 'IP Address,Hostname',
+}
+
+# Messages are newline delimited JSON. A chunk of targets is sent as a
+# single line, so allow lines much larger than the asyncio default.
+STREAM_LIMIT = 2 ** 24
+
+
+def load_tool(mode: str):
+    """Imports and returns the scanning module for the specified mode."""
+    return importlib.import_module(TOOLS[mode])
+
+
+def parse_address(address: str) -> tuple:
+    """Splits a host:port string into a (host, port) tuple."""
+    host, _, port = address.rpartition(':')
+    if not host or not port.isdigit():
+        raise ValueError(f'Invalid address: {address}. Please specify host:port.')
+    return host.strip('[]'), int(port)
+
+
+def send_message(writer, message: dict):
+    """Writes a message to the stream as a line of JSON."""
+    writer.write(json.dumps(message, default=str).encode() + b'\n')
+
+
+async def read_message(reader) -> dict:
+    """Reads one line of JSON from the stream. Returns None if the
+    connection has been closed. Raises ValueError if the line is not a
+    JSON object.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    message = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError(f'Expected a JSON object, got: {line[:50]}')
+    return message
+
+
+def format_row(mode: str, row: list) -> str:
+    """Formats a result row for printing to the terminal."""
+    if mode == 'web':
+        p_item = load_tool('web').format_for_printing([row[0], row[1], row[2], row[4], row[5]])
+        return f"{p_item[0]:45}{p_item[1]:10}{p_item[2]:10}{p_item[3]:25}{p_item[4]:20}"
+    return f"{row[0]:20}{row[1]:20}"
+
+
+class Lease():
+    """A chunk of targets handed to a worker. The lease is renewed each
+    time the worker sends a message, and expires if the worker goes quiet
+    for longer than the lease timeout.
+    """
+
+    def __init__(self, lease_id: int, worker: str, targets: list):
+        self.lease_id = lease_id
+        self.worker = worker
+        self.remaining = set(targets)
+        self.started = set()
+        self.stealing = False
+        self.renewed = time.monotonic()
+
+    def unstarted(self) -> int:
+        """Returns the number of targets the worker may not have started,
+        as of its last report.
+        """
+        return len(self.remaining - self.started)
+
+
+class Coordinator():
+    """Splits the targets into chunks and leases them to workers as they
+    ask for work. Chunks held by dead or silent workers are put back in
+    the queue. Once the queue is empty, the worker with the most unstarted
+    targets is asked to release half of them for idle workers to take.
+    Requests that are already in flight are never taken away.
+    """
+
+    def __init__(self, mode: str, targets: list, config: dict):
+        self.mode = mode
+        self.targets = set(targets)
+        self.config = config
+        self.pending = collections.deque(
+            targets[i:i + args.chunk_size] for i in range(0, len(targets), args.chunk_size)
+        )
+        self.leases = {}
+        self.owners = {}
+        self.results = {}
+        self.writers = {}
+        self.handlers = set()
+        self.lease_ids = itertools.count(1)
+        self.worker_ids = itertools.count(1)
+        self.finished = asyncio.Event()
+        if args.quiet:
+            self.p_bar = tqdm.tqdm(total=len(targets))
+
+    def next_lease(self, worker: str) -> dict:
+        """Returns the reply to a worker asking for work."""
+        if self.finished.is_set():
+            return {'type': 'done'}
+        targets = []
+        while self.pending and not targets:
+            targets = [t for t in self.pending.popleft() if t not in self.results]
+        if not targets:
+            # Released targets arrive shortly, so check back sooner
+            if self.steal(worker):
+                return {'type': 'wait', 'delay': 0.2}
+            return {'type': 'wait', 'delay': 1}
+        lease = Lease(next(self.lease_ids), worker, targets)
+        self.leases[lease.lease_id] = lease
+        for target in targets:
+            self.owners[target] = lease.lease_id
+        return {'type': 'chunk', 'lease_id': lease.lease_id, 'targets': targets}
+
+    def steal(self, worker: str) -> bool:
+        """Asks the worker holding the lease with the most unstarted
+        targets to release half of them. The released targets are queued
+        by release() when the worker replies. Returns True if a request
+        was sent.
+        """
+        leases = [
+            l for l in self.leases.values()
+            if l.worker != worker and not l.stealing and l.worker in self.writers
+        ]
+        if not leases:
+            return False
+        victim = max(leases, key=lambda l: l.unstarted())
+        if victim.unstarted() < 2:
+            return False
+        victim.stealing = True
+        send_message(self.writers[victim.worker], {'type': 'steal', 'lease_id': victim.lease_id})
+        return True
+
+    def release(self, worker: str, lease_id: int, targets: list, started: list):
+        """Queues the unstarted targets a worker gave up in reply to a
+        steal request, and records which targets it has already started.
+        """
+        lease = self.leases.get(lease_id)
+        if lease and lease.worker == worker:
+            lease.stealing = False
+            lease.started = set(started)
+            lease.remaining.difference_update(targets)
+        targets = sorted(
+            t for t in targets
+            if self.owners.get(t) == lease_id and t not in self.results
+        )
+        for target in targets:
+            self.owners.pop(target)
+        if targets:
+            self.pending.append(targets)
+            if args.debug:
+                print(f"[*] {worker} released {len(targets)} unstarted targets")
+
+    def requeue(self, lease: Lease):
+        """Drops a lease and puts its unfinished targets back at the front
+        of the queue.
+        """
+        self.leases.pop(lease.lease_id, None)
+        targets = sorted(t for t in lease.remaining if t not in self.results)
+        for target in targets:
+            self.owners.pop(target, None)
+        if targets:
+            self.pending.appendleft(targets)
+            if args.debug:
+                print(f"[*] Re-leasing {len(targets)} targets from {lease.worker}")
+
+    def record(self, target: str, row: list):
+        """Merges a result from a worker. The first result for a target
+        wins, so work duplicated by re-leasing is dropped.
+        """
+        if target not in self.targets or target in self.results:
+            return
+        self.results[target] = row
+        lease = self.leases.get(self.owners.pop(target, None))
+        if lease:
+            lease.remaining.discard(target)
+        if args.quiet:
+            self.p_bar.update(1)
+        elif row:
+            print(format_row(self.mode, row))
+        if len(self.results) == len(self.targets):
+            self.finished.set()
+
+    def renew(self, worker: str):
+        """Renews all leases held by a worker."""
+        now = time.monotonic()
+        for lease in self.leases.values():
+            if lease.worker == worker:
+                lease.renewed = now
+
+    async def expire_leases(self):
+        """Re-leases chunks from workers that have stopped responding."""
+        while not self.finished.is_set():
+            await asyncio.sleep(1)
+            deadline = time.monotonic() - args.lease_timeout
+            for lease in [l for l in self.leases.values() if l.renewed < deadline]:
+                if args.debug:
+                    print(f"[-] Lease {lease.lease_id} held by {lease.worker} expired")
+                self.requeue(lease)
+
+    async def handle_worker(self, reader, writer):
+        """Serves a single worker connection."""
+        worker = None
+        self.handlers.add(asyncio.current_task())
+        try:
+            hello = await read_message(reader)
+            if not hello or hello.get('type') != 'hello':
+                return
+            worker = f"{hello.get('name', 'worker')}#{next(self.worker_ids)}"
+            self.writers[worker] = writer
+            if args.debug:
+                print(f"[+] Worker connected: {worker}")
+            send_message(writer, self.config)
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                self.renew(worker)
+                if message['type'] == 'lease':
+                    send_message(writer, self.next_lease(worker))
+                elif message['type'] == 'result':
+                    self.record(message['target'], message['row'])
+                elif message['type'] == 'release':
+                    self.release(worker, message['lease_id'], message['targets'], message['started'])
+                elif message['type'] == 'complete':
+                    lease = self.leases.get(message['lease_id'])
+                    if lease and lease.worker == worker:
+                        self.requeue(lease)
+                await writer.drain()
+        except (ConnectionError, ValueError, KeyError, TypeError) as e:
+            if args.debug:
+                print(f"[-] {worker}: {e}")
+        finally:
+            self.writers.pop(worker, None)
+            for lease in [l for l in self.leases.values() if l.worker == worker]:
+                self.requeue(lease)
+            writer.close()
+            self.handlers.discard(asyncio.current_task())
+            if args.debug and worker:
+                print(f"[-] Worker disconnected: {worker}")
+
+    async def serve(self, host: str, port: int):
+        """Accepts workers until every target has a result."""
+        server = await asyncio.start_server(self.handle_worker, host, port, limit=STREAM_LIMIT)
+        print(f"[*] Listening for workers on {host}:{port}. {len(self.targets)} targets in {len(self.pending)} chunks.")
+        if not self.targets:
+            self.finished.set()
+        expiry = asyncio.ensure_future(self.expire_leases())
+        await self.finished.wait()
+        expiry.cancel()
+        server.close()
+        for writer in list(self.writers.values()):
+            send_message(writer, {'type': 'done'})
+            writer.close()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        await server.wait_closed()
+
+
+def configure_worker(tool, config: dict) -> bool:
+    """Sets up the module level state the scanning functions expect.
+    Returns False if the worker cannot scan with this configuration.
+    """
+    if config['mode'] == 'web':
+        # Capture is turned on by the coordinator, but each node can store
+        # the captures somewhere else with its own --capture_dir.
+        capture_dir = None
+        if config['capture_dir']:
+            capture_dir = args.capture_dir or config['capture_dir']
+        tool.args = argparse.Namespace(
+            timeout=config['timeout'],
+            random_agent=config['random_agent'],
+            proxy=config['proxy'],
+            capture_dir=capture_dir,
+            max_body_size=config['max_body_size'],
+            quiet=args.quiet,
+            debug=args.debug
+        )
+        tool.my_proxy = config['proxy'] or ''
+        tool.data = []
+        if capture_dir:
+            try:
+                tool.capture_index = tool.open_capture_store(capture_dir)
+            except OSError as e:
+                print(f"[-] Unable to open capture directory {capture_dir}: {e}")
+                return False
+        tool.captured_hashes = set()
+        tool.capture_writes = {}
+        if args.quiet:
+            tool.p_bar = tool.tqdm.tqdm()
+            tool.counter = 0
+    else:
+        tool.args = argparse.Namespace(quiet=args.quiet)
+        tool.resolved_data = []
+    return True
+
+
+async def scan_chunk(tool, mode: str, lease: dict, writer, session, queue: collections.deque, started: set):
+    """Scans the targets in a chunk, at most args.concurrency at a time,
+    and streams each result back to the coordinator as soon as it is
+    available. Targets wait in the queue until a slot is free, so they
+    can still be released to other workers.
+    """
+    queue.extend(lease['targets'])
+    if mode == 'web':
+        scanners = {t: tool.fetch for t in lease['targets']}
+    else:
+        ip_addresses, hostnames, _ = tool.validate_input_data(lease['targets'])
+        scanners = {t: tool.find_hostname for t in ip_addresses}
+        scanners.update({t: tool.find_ipaddress for t in hostnames})
+
+    async def scan_next():
+        while queue:
+            target = queue.popleft()
+            started.add(target)
+            if mode == 'web':
+                row = await scanners[target](target, session)
+            elif target in scanners:
+                row = await scanners[target](target)
+            else:
+                row = None
+            send_message(writer, {
+                'type': 'result',
+                'lease_id': lease['lease_id'],
+                'target': target,
+                'row': row
+            })
+
+    await asyncio.gather(*[scan_next() for _ in range(args.concurrency)], return_exceptions=True)
+    started.clear()
+    if mode == 'web':
+        tool.data.clear()
+    else:
+        tool.resolved_data.clear()
+
+
+async def run_worker(host: str, port: int):
+    """Asks the coordinator for chunks of targets until there is no work
+    left.
+    """
+    try:
+        reader, writer = await asyncio.open_connection(host, port, limit=STREAM_LIMIT)
+    except OSError as e:
+        print(f"[-] Unable to connect to coordinator {host}:{port}: {e}")
+        return
+    send_message(writer, {'type': 'hello', 'name': f'{socket.gethostname()}:{os.getpid()}'})
+    config = await read_message(reader)
+    mode = config['mode']
+    tool = load_tool(mode)
+    if not configure_worker(tool, config):
+        writer.close()
+        return
+    print(f"[+] Connected to coordinator {host}:{port} ({mode} mode).")
+
+    replies = asyncio.Queue()
+    stopped = asyncio.Event()
+    queue = collections.deque()
+    started = set()
+    lease_id = None
+
+    async def read_replies():
+        """Dispatches messages from the coordinator. Steal requests are
+        answered straight away by giving up half of the targets that have
+        not been started, everything else is a reply to a lease request.
+        """
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None or message['type'] == 'done':
+                    break
+                if message['type'] == 'steal':
+                    released = []
+                    if message['lease_id'] == lease_id:
+                        released = [queue.pop() for _ in range(len(queue) // 2)]
+                    send_message(writer, {
+                        'type': 'release',
+                        'lease_id': message['lease_id'],
+                        'targets': released,
+                        'started': sorted(started)
+                    })
+                else:
+                    await replies.put(message)
+        except (ConnectionError, ValueError) as e:
+            if args.debug:
+                print(f"[-] Lost coordinator: {e}")
+
+        # Requests in flight are left to finish, nothing new is started
+        stopped.set()
+        queue.clear()
+        await replies.put({'type': 'done'})
+
+    async def send_heartbeats():
+        """Keeps leases alive while slow requests are in flight."""
+        while True:
+            await asyncio.sleep(config['heartbeat'])
+            send_message(writer, {'type': 'heartbeat'})
+
+    reader_task = asyncio.ensure_future(read_replies())
+    heartbeat_task = asyncio.ensure_future(send_heartbeats())
+    session = tool.aiohttp.ClientSession() if mode == 'web' else None
+    try:
+        while not stopped.is_set():
+            send_message(writer, {'type': 'lease'})
+            await writer.drain()
+            reply = await replies.get()
+            if reply['type'] == 'done':
+                break
+            if reply['type'] == 'wait':
+                try:
+                    await asyncio.wait_for(stopped.wait(), reply['delay'])
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            lease_id = reply['lease_id']
+            await scan_chunk(tool, mode, reply, writer, session, queue, started)
+            lease_id = None
+            if not stopped.is_set():
+                send_message(writer, {'type': 'complete', 'lease_id': reply['lease_id']})
+    except ConnectionError as e:
+        if args.debug:
+            print(f"[-] Lost coordinator: {e}")
+    finally:
+        heartbeat_task.cancel()
+        reader_task.cancel()
+        if session:
+            await session.close()
+        if mode == 'web' and tool.args.capture_dir:
+            tool.capture_index.close()
+        writer.close()
+    print("[+] No work left. Worker exiting.")
+
+
+def run_coordinator():
+    """Serves the targets to workers and writes the merged results to a
+    CSV file.
+    """
+    # Everything a worker needs to scan the same way as the coordinator
+    config = {
+        'type': 'config',
+        'mode': args.mode,
+        'heartbeat': args.lease_timeout / 3,
+        'timeout': args.timeout,
+        'random_agent': args.random_agent,
+        'proxy': args.proxy,
+        'capture_dir': args.capture_dir,
+        'max_body_size': args.max_body_size,
+    }
+    host, port = parse_address(args.listen)
+
+    async def coordinate():
+        coordinator = Coordinator(args.mode, targets, config)
+        await coordinator.serve(host, port)
+        return coordinator
+
+    coordinator = asyncio.run(coordinate())
+
+    # Write data to CSV in target order, skipping targets without a response
+    mode = 'a' if args.append else 'w'
+    with open(csv_name, mode, encoding="utf-8") as fh:
+        if not args.append:
+            if args.mode == 'web' and args.capture_dir:
+                fh.write(CSV_HEADERS[args.mode] + ',Body Hash\n')
+            else:
+                fh.write(CSV_HEADERS[args.mode] + '\n')
+        for target in targets:
+            row = coordinator.results.get(target)
+            if row:
+                fh.write(','.join(str(i) for i in row) + '\n')
+
+    print()
+    print(f"[+] Results written to {csv_name}.")
+
+
+def main():
+    """Runs either the coordinator or a worker."""
+    if args.command == 'coordinator':
+        run_coordinator()
+    else:
+        host, port = parse_address(args.coordinator)
+        asyncio.run(run_worker(host, port))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest='command')
+
+    coordinator_parser = subparsers.add_parser(
+        'coordinator',
+        help="Split targets into chunks and hand them out to workers."
+    )
+    coordinator_parser.add_argument(
+        "-m", "--mode",
+        choices=sorted(TOOLS),
+        required=True,
+        help="Scan with web_requester (web) or address_resolver (resolve)."
+    )
+    coordinator_parser.add_argument(
+        "-l", "--listen",
+        default='0.0.0.0:8787',
+        help="Specify the address workers connect to (default=0.0.0.0:8787)."
+    )
+    coordinator_parser.add_argument(
+        "-c", "--csv",
+        nargs='?',
+        default='results.csv',
+        help="Specify the name of a csv file to write to."
+    )
+    coordinator_parser.add_argument(
+        "-f", "--filename",
+        help="Specify a file containing URLs (web) or hostnames and IP addresses (resolve)."
+    )
+    coordinator_parser.add_argument(
+        "-u", "--url",
+        nargs="*",
+        help="Specify URL(s) to connect (web)."
+    )
+    coordinator_parser.add_argument(
+        "--range",
+        help="Specify the network range (10.10.10.0/24 or 10.10.10.20-40) (resolve)."
+    )
+    coordinator_parser.add_argument(
+        "--make_urls_http",
+        help="Appends http:// to all input data (web).",
+        action="store_true"
+    )
+    coordinator_parser.add_argument(
+        "--make_urls_https",
+        help="Appends https:// to all input data (web).",
+        action="store_true"
+    )
+    coordinator_parser.add_argument(
+        "--random_agent",
+        action="store_true",
+        help="Uses a different User-Agent for each request (web)."
+    )
+    coordinator_parser.add_argument(
+        "-p", "--proxy",
+        help="Specify a proxy (http://127.0.0.1:8080) for the workers to use (web)."
+    )
+    coordinator_parser.add_argument(
+        "-to", "--timeout",
+        nargs="?",
+        type=float,
+        default=10,
+        help="Specify number of seconds until a connection timeout (default=10) (web)."
+    )
+    coordinator_parser.add_argument(
+        "--capture_dir",
+        help="Workers write response headers and compressed bodies to a content-addressed store in this directory on their own node (web)."
+    )
+    coordinator_parser.add_argument(
+        "--max_body_size",
+        type=int,
+        default=1048576,
+        help="Specify the maximum number of body bytes to capture (default=1048576) (web)."
+    )
+    coordinator_parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=250,
+        help="Specify number of targets handed to a worker at a time (default=250)."
+    )
+    coordinator_parser.add_argument(
+        "--lease_timeout",
+        type=float,
+        default=60,
+        help="Specify number of seconds a silent worker keeps its chunk before it is re-leased (default=60)."
+    )
+    coordinator_parser.add_argument(
+        "-q", "--quiet",
+        help="Suppresses output to the terminal. CSV will still be created.",
+        action="store_true"
+    )
+    coordinator_parser.add_argument(
+        "-a", "--append",
+        help="Will write to the CSV file in append mode.",
+        action="store_true"
+    )
+    coordinator_parser.add_argument(
+        "--debug",
+        help="Print data about workers, leases, and exceptions",
+        action="store_true"
+    )
+
+    worker_parser = subparsers.add_parser(
+        'worker',
+        help="Scan chunks of targets handed out by a coordinator."
+    )
+    worker_parser.add_argument(
+        "coordinator",
+        help="Specify the address of the coordinator (10.2.2.1:8787)."
+    )
+    worker_parser.add_argument(
+        "-q", "--quiet",
+        help="Suppresses output to the terminal.",
+        action="store_true"
+    )
+    worker_parser.add_argument(
+        "--debug",
+        help="Print data about exceptions",
+        action="store_true"
+    )
+    worker_parser.add_argument(
+        "--capture_dir",
+        help="Store response captures in this directory on this node instead of the coordinator's --capture_dir (web)."
+    )
+    worker_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=100,
+        help="Specify number of targets scanned at a time. Targets waiting for a slot can be handed to idle workers (default=100)."
+    )
+    args = parser.parse_args()
+
+    if not args.command:
+        parser.print_help()
+        exit()
+
+    if args.command == 'worker' and args.concurrency <= 0:
+        print('[-] Please specify a --concurrency greater than 0.')
+        exit()
+
+    if args.command == 'coordinator':
+        if args.mode == 'web' and not args.filename and not args.url:
+            coordinator_parser.print_help()
+            print("[-] Please specify an input file listing URLs (-f), or specific URLs (-u)")
+            exit()
+        if args.mode == 'resolve' and not args.filename and not args.range:
+            coordinator_parser.print_help()
+            print("[-] Please specify an input file listing IP addresses "
+                  "and/or hostnames (-f) or a range of IP address (--range).")
+            exit()
+        if args.filename and not os.path.exists(args.filename):
+            coordinator_parser.print_help()
+            print(f"[-] The file {args.filename} cannot be found or you do not have "
+                   "permission to open the file.")
+            exit()
+
+        # Builds and validates the targets the same way as the standalone tool
+        tool = load_tool(args.mode)
+        try:
+            if args.mode == 'web':
+                input_data = tool.build_input_data(args.url, args.filename, args.make_urls_http, args.make_urls_https)
+                targets = sorted(tool.validate_urls(input_data))
+            else:
+                targets = sorted(tool.build_input_data(args.filename, args.range))
+        except ValueError as error:
+            coordinator_parser.print_help()
+            print(f'[-] {error}')
+            exit()
+        if args.chunk_size <= 0:
+            print('[-] Please specify a --chunk_size greater than 0.')
+            exit()
+        if args.lease_timeout <= 0:
+            print('[-] Please specify a --lease_timeout greater than 0.')
+            exit()
+        if args.max_body_size < 0:
+            print('[-] Please specify a --max_body_size of 0 or greater.')
+            exit()
+        if args.proxy and not args.proxy.startswith('http'):
+            print('[-] Please specify the protocol. Example: -p http://your.proxy:port. Only HTTP proxies are currently supported by aiohttp.')
+            exit()
+        if args.csv.endswith(".csv"):
+            csv_name = args.csv
+        else:
+            csv_name = args.csv + '.csv'
+        if args.quiet:
+            import tqdm
+
+    # Print banner
+    print()
+    word_banner = '{} version: {}. Coded by: {}'.format(sys.argv[0].title()[:-3], __version__, __author__)
+    print('=' * len(word_banner))
+    print(word_banner)
+    print('=' * len(word_banner))
+    print()
+
+    main()
@@ -8,7 +8,7 @@ __description__ = '''A fast web scanner that pulls title and server information'
 
 
 import sys
-if sys.version < "3.5":
+if sys.version_info < (3, 5):
     print('[-] This script requires at least Python 3.5. Sorry.')
     exit()
 
@@ -19,6 +19,11 @@ import argparse
 import os
 import itertools
 import time
+import gzip
+import hashlib
+import json
+import socket
+import tempfile
 from urllib.parse import urlparse
 
 # Third party modules
@@ -37,6 +42,13 @@ if missing_modules:
         print('[*] Try running "python3 -m pip install {}", or do an Internet search for installation instructions.\n'.format(m.strip("'")))
     exit()
 
+# Optional module. Captured bodies are compressed with zstd if it is
+# installed, otherwise gzip.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 
 def validate_input_data(data: str) -> str:
     """Checks if input data is in the proto://addr:port format."""
@@ -47,7 +59,7 @@ def validate_input_data(data: str) -> str:
         else:
             if parsed_url.scheme == 'https':
                 url = data + ':443'
-            elif parsed_url.schema == 'http':
+            elif parsed_url.scheme == 'http':
                 url = data + ':80'
             else:
                 print(f'[-] Invalid protocol: {data}. Please specify HTTP or HTTPS. (https://example.com). Skipping URL.')
@@ -58,6 +70,37 @@ def validate_input_data(data: str) -> str:
     return url
 
 
+def validate_urls(input_data: list) -> list:
+    """Validates each item with validate_input_data and returns the URLs
+    that passed.
+    """
+    urls = [validate_input_data(i) for i in input_data]
+    return [u for u in urls if u != '']
+
+
+def build_input_data(urls: list, filename: str, make_urls_http: bool, make_urls_https: bool) -> list:
+    """Reads URLs from the command line or a file, removes duplicates, and
+    optionally adds http:// or https:// to every item.
+    """
+    input_data = []
+    if urls:
+        input_data = urls
+    if filename:
+        with open(filename) as f:
+            input_data = f.read().splitlines()
+
+    # Remove duplicates from the list
+    input_data = list(set(input_data))
+
+    # Allows easy way to convert a list of IP addresses or domain names
+    # to URLs.
+    if make_urls_http:
+        input_data = ['http://' + i for i in input_data]
+    if make_urls_https:
+        input_data = ['https://' + i for i in input_data]
+    return input_data
+
+
 def get_random_useragent() -> str:
     """Returns a randomly chosen User-Agent string."""
     win_edge = f'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{random.randrange(40,50)}.0.{random.randrange(1000,4000)}.{random.randrange(0,999)} Safari/{random.randrange(530,600)}.{random.randrange(0,99)} Edge/12.{random.randrange(0,999)}'
@@ -93,7 +136,11 @@ async def fetch_all(urls: list):
 async def fetch(url: str, session):
     """Fetch a url, using specified ClientSession. Adapted from:
     https://gist.github.com/dmahugh/b043ecbc4c61920aa685e0febbabb959
+
+    Returns the row appended to the data list, or None if the request
+    failed.
     """
+    row = None
 
     # Sets the timeout so connections don't slow things down
     timeout = aiohttp.ClientTimeout(sock_connect=args.timeout)
@@ -121,14 +168,19 @@ async def fetch(url: str, session):
                 response_text = await response.text()
                 server_header = get_server_header(response_headers)
                 site_title = get_html_title(response_text)
-                data.append([
+                if args.capture_dir:
+                    body_hash = await capture_response(request_url, response)
+                row = [
                     request_url,
                     response_status_code,
                     redirect,
                     response_url,
                     server_header,
                     site_title
-                ])
+                ]
+                if args.capture_dir:
+                    row.append(body_hash)
+                data.append(row)
                 p_item = format_for_printing([request_url, response_status_code, redirect, server_header, site_title])
 
                 # Prints to the screen if you want.
@@ -152,14 +204,19 @@ async def fetch(url: str, session):
                 response_text = await response.text()
                 server_header = get_server_header(response_headers)
                 site_title = get_html_title(response_text)
-                data.append([
+                if args.capture_dir:
+                    body_hash = await capture_response(request_url, response)
+                row = [
                     request_url,
                     response_status_code,
                     redirect,
                     response_url,
                     server_header,
                     site_title
-                ])
+                ]
+                if args.capture_dir:
+                    row.append(body_hash)
+                data.append(row)
                 p_item = format_for_printing([request_url, response_status_code, redirect, server_header, site_title])
                 if not args.quiet:
                     print(f"{p_item[0]:45}{p_item[1]:10}{p_item[2]:10}{p_item[3]:25}{p_item[4]:20}")
@@ -173,6 +230,8 @@ async def fetch(url: str, session):
     if args.quiet:
         p_bar.update(counter + 1)
 
+    return row
+
 
 def get_html_title(contents: str) -> str:
     """Uses regex to parse the title from the HTML content."""
@@ -183,6 +242,94 @@ def get_html_title(contents: str) -> str:
     return title
 
 
+def open_capture_store(capture_dir: str):
+    """Creates the capture directory if needed and returns the index file
+    that captured response headers are appended to. Each process gets its
+    own index file, so several scanners can share a directory and stores
+    from different nodes can be merged by copying them together.
+    """
+    os.makedirs(capture_dir, exist_ok=True)
+    index_name = f"responses.{socket.gethostname()}.{os.getpid()}.jsonl"
+    return open(os.path.join(capture_dir, index_name), 'a', encoding="utf-8")
+
+
+def write_blob(path: str, body: bytes):
+    """Compresses a response body and writes it to the capture store.
+    Writes to a temporary file first so a partial blob is never seen
+    under its final name.
+    """
+    if zstandard:
+        blob = zstandard.ZstdCompressor().compress(body)
+    else:
+        blob = gzip.compress(body)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(blob)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+async def capture_response(url: str, response) -> str:
+    """Records the response headers in the capture index and stores the
+    body (truncated to max_body_size) once per unique SHA-256 hash.
+    Returns the body hash, or an empty string if the body could not be
+    stored.
+    """
+    body = await response.read()
+    captured_body = body[:args.max_body_size]
+    body_hash = hashlib.sha256(captured_body).hexdigest()
+
+    # Identical pages (default installs, login portals) are only written
+    # once. Blobs from an earlier run into the same directory are kept.
+    # Responses that arrive while the same body is being written wait for
+    # that write instead of starting another. The hash is only marked as
+    # stored once the blob is on disk, so a failed write is retried by the
+    # next response with the same body.
+    if body_hash not in captured_hashes:
+        if body_hash in capture_writes:
+            stored = await asyncio.shield(capture_writes[body_hash])
+        else:
+            loop = asyncio.get_event_loop()
+            write = loop.create_future()
+            capture_writes[body_hash] = write
+            stored = False
+            try:
+                extension = '.zst' if zstandard else '.gz'
+                path = os.path.join(args.capture_dir, body_hash[:2], body_hash + extension)
+                if not os.path.exists(path):
+                    await loop.run_in_executor(None, write_blob, path, captured_body)
+                stored = True
+            except Exception as e:
+                if args.debug:
+                    print(f"[-] {url}: Unable to capture response body: {e}")
+            finally:
+                del capture_writes[body_hash]
+                if stored:
+                    captured_hashes.add(body_hash)
+                write.set_result(stored)
+        if not stored:
+            body_hash = ''
+
+    try:
+        capture_index.write(json.dumps({
+            'url': url,
+            'response_url': str(response.url),
+            'status': response.status,
+            'headers': list(response.headers.items()),
+            'body_hash': body_hash,
+            'body_size': len(body),
+            'truncated': len(body) > args.max_body_size
+        }) + '\n')
+    except OSError as e:
+        if args.debug:
+            print(f"[-] {url}: Unable to capture response headers: {e}")
+    return body_hash
+
+
 def make_async_requests(urls: list):
     """Fetch list of web pages asynchronously."""
     loop = asyncio.get_event_loop() # event loop
@@ -219,8 +366,7 @@ def main():
 
     # Makes sure the URLs specify HTTP or HTTPS and has or port
     # or a port is added, default 80 for HTTP or 443 for HTTPS
-    urls = [validate_input_data(i) for i in input_data]
-    urls = [u for u in urls if u != '']
+    urls = validate_urls(input_data)
     
     # Exits if no URLs pass validation
     if not urls: exit()
@@ -238,16 +384,23 @@ def main():
     else:
         make_async_requests(urls)
 
-    # Write data to CSV
+    # Write data to CSV. Capture mode adds a Body Hash column.
     if args.append:
         with open(csv_name, 'a', encoding="utf-8") as fh:
             for item in data:
-                fh.write(f"{item[0]},{item[1]},{item[2]},{item[3]},{item[4]},{item[5]}\n")
+                fh.write(','.join(str(i) for i in item) + '\n')
     else:
         with open(csv_name, 'w', encoding="utf-8") as fh:
-            fh.write("Requested URL,Response Code,isRedirect,Response URL,Server Header,Title\n")
+            if args.capture_dir:
+                fh.write("Requested URL,Response Code,isRedirect,Response URL,Server Header,Title,Body Hash\n")
+            else:
+                fh.write("Requested URL,Response Code,isRedirect,Response URL,Server Header,Title\n")
             for item in data:
-                fh.write(f"{item[0]},{item[1]},{item[2]},{item[3]},{item[4]},{item[5]}\n")
+                fh.write(','.join(str(i) for i in item) + '\n')
+
+    if args.capture_dir:
+        capture_index.close()
+        print(f"[+] Captured {len(captured_hashes)} unique bodies to {args.capture_dir}.")
 
     print()
     print(f"[+] Results written to {csv_name}.")
@@ -318,11 +471,18 @@ if __name__ == '__main__':
         default=1500, 
         help="Specify number of connections. Windows needs this, otherwise you get an error with a large amount of connections (default=1500)"
     )
+    parser.add_argument(
+        "--capture_dir",
+        help="Writes response headers and compressed bodies to a content-addressed store in this directory. Adds the body hash to the CSV."
+    )
+    parser.add_argument(
+        "--max_body_size",
+        type=int,
+        default=1048576,
+        help="Specify the maximum number of body bytes to capture (default=1048576)"
+    )
     args = parser.parse_args()
 
-    # Initialize input data
-    input_data = []
-
     # Exits if user does not specify URLs via filename or directly
     if not args.filename and not args.url:
         parser.print_help()
@@ -330,9 +490,6 @@ if __name__ == '__main__':
               "and/or hostnames (-f), or specific URLs (-u)")
         exit()
 
-    # Assigns input_data to user supplied URLs via the args.url or args.filename
-    if args.url:
-        input_data = args.url
     if args.filename:
         filename = args.filename
         if not os.path.exists(filename):
@@ -340,9 +497,6 @@ if __name__ == '__main__':
             print(f"[-] The file {filename} cannot be found or you do not have "
                    "permission to open the file.")
             exit()
-        with open(filename) as f:
-            input_data = f.read().splitlines()
-
 
     # Assigns the name to the CSV file to be generated
     if args.csv.endswith(".csv"):
@@ -359,6 +513,11 @@ if __name__ == '__main__':
     else:
         my_proxy = ''
 
+    # Capture size limit
+    if args.max_body_size < 0:
+        print('[-] Please specify a --max_body_size of 0 or greater.')
+        exit()
+
     # Print banner
     print()
     word_banner = '{} version: {}. Coded by: {}'.format(sys.argv[0].title()[:-3], __version__, __author__)
@@ -368,15 +527,8 @@ if __name__ == '__main__':
     print()
     time.sleep(1)
 
-    # Remove duplicates from the list
-    input_data = list(set(input_data))
-
-    # Allows easy way to convert a list of IP addresses or domain names
-    # to URLs. 
-    if args.make_urls_http:
-        input_data = ['http://' + i for i in input_data]
-    if args.make_urls_https:
-        input_data = ['https://' + i for i in input_data]
+    # Assigns input_data to user supplied URLs via the args.url or args.filename
+    input_data = build_input_data(args.url, args.filename, args.make_urls_http, args.make_urls_https)
 
     # Default set to 1500, this only applies to Windows machines.
     # Limits the number of connections you can have. If you get an error,
@@ -393,4 +545,11 @@ if __name__ == '__main__':
 
     # Global variable for output data
     data = []
+
+    # Response capture store, the body hashes already written to it, and
+    # the blob writes in progress
+    if args.capture_dir:
+        capture_index = open_capture_store(args.capture_dir)
+    captured_hashes = set()
+    capture_writes = {}
     main()
\ No newline at end of file